@@ -0,0 +1,9 @@
+# numba is optional, without it njit leaves the kernels as plain python and
+# numpy code
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
@@ -1,16 +1,35 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Callable
+from functools import wraps
+from typing import Callable, ClassVar, List
+
+# integer tags of the concrete order classes, buy kinds are even and sell
+# kinds are odd
+MARKET_BUY = 0
+MARKET_SELL = 1
+LIMIT_BUY = 2
+LIMIT_SELL = 3
+STOP_BUY = 4
+STOP_SELL = 5
 
 
 @dataclass
 class Order:
+    # abstract order classes declare no slots of their own, so the concrete
+    # classes can combine several of them and hold every field in slots
+    __slots__ = ()
+
+    KIND: ClassVar[int]
+    IS_BUY: ClassVar[bool]
+
     order_id: str
     fill_handler: Callable[[Order], None]
 
 
 @dataclass
 class FilledOrder:
+    __slots__ = ('order', 'price', 'quantity')
+
     order: Order
     price: float
     quantity: float
@@ -18,55 +37,104 @@ class FilledOrder:
 
 @dataclass
 class BuyOrder(Order):
+    __slots__ = ()
+
+    IS_BUY: ClassVar[bool] = True
+
     budget: float
 
 
 @dataclass
 class SellOrder(Order):
+    __slots__ = ()
+
+    IS_BUY: ClassVar[bool] = False
+
     quantity: float
 
 
 @dataclass
 class MarketOrder(Order):
-    ...
+    __slots__ = ()
 
 
 @dataclass
 class LimitOrder(Order):
+    __slots__ = ()
+
     limit_price: float
 
 
 @dataclass
 class StopOrder(Order):
+    __slots__ = ()
+
     stop_price: float
     limit_price: float
 
 
 @dataclass
 class MarketBuyOrder(MarketOrder, BuyOrder):
-    ...
+    __slots__ = ('order_id', 'fill_handler', 'budget')
+
+    KIND: ClassVar[int] = MARKET_BUY
 
 
 @dataclass
 class LimitBuyOrder(LimitOrder, BuyOrder):
-    ...
+    __slots__ = ('order_id', 'fill_handler', 'budget', 'limit_price')
+
+    KIND: ClassVar[int] = LIMIT_BUY
 
 
 @dataclass
 class StopBuyOrder(StopOrder, BuyOrder):
-    ...
+    __slots__ = ('order_id', 'fill_handler', 'budget', 'stop_price',
+                 'limit_price')
+
+    KIND: ClassVar[int] = STOP_BUY
 
 
 @dataclass
 class MarketSellOrder(MarketOrder, SellOrder):
-    ...
+    __slots__ = ('order_id', 'fill_handler', 'quantity')
+
+    KIND: ClassVar[int] = MARKET_SELL
 
 
 @dataclass
 class LimitSellOrder(LimitOrder, SellOrder):
-    ...
+    __slots__ = ('order_id', 'fill_handler', 'quantity', 'limit_price')
+
+    KIND: ClassVar[int] = LIMIT_SELL
 
 
 @dataclass
 class StopSellOrder(StopOrder, SellOrder):
-    ...
+    __slots__ = ('order_id', 'fill_handler', 'quantity', 'stop_price',
+                 'limit_price')
+
+    KIND: ClassVar[int] = STOP_SELL
+
+
+def batch_fill_handler(fill_handler: Callable[[List[FilledOrder]], None]) \
+        -> Callable[[List[FilledOrder]], None]:
+    """mark a fill handler as taking all the orders it filled on a step in
+    a single call, instead of one call per filled order
+
+    the handler is wrapped rather than flagged, so marking a bound method
+    leaves the method of every other instance unbatched
+
+    Args:
+        fill_handler (Callable[[List[FilledOrder]], None]): function or bound
+            method called with the filled orders
+
+    Returns:
+        Callable[[List[FilledOrder]], None]: the marked fill handler
+    """
+    @wraps(fill_handler)
+    def batched_fill_handler(filled_orders: List[FilledOrder]):
+        fill_handler(filled_orders)
+
+    batched_fill_handler.batched = True
+    return batched_fill_handler
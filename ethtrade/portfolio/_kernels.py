@@ -0,0 +1,94 @@
+from typing import Tuple, Union
+import numpy as np
+
+from ethtrade._jit import njit
+
+
+@njit(cache=True)
+def trigger_bounds(price: Union[int, float], limit_buy_prices: np.ndarray,
+                   limit_sell_prices: np.ndarray,
+                   stop_buy_prices: np.ndarray,
+                   stop_sell_prices: np.ndarray) -> Tuple[int, int, int, int]:
+    """find the triggered orders in the sorted price arrays of a portfolio
+
+    Args:
+        price (Union[int, float]): current price, in ticks if the arrays
+            hold ticks
+        limit_buy_prices (np.ndarray): sorted limit buy prices
+        limit_sell_prices (np.ndarray): sorted limit sell prices
+        stop_buy_prices (np.ndarray): sorted stop buy prices
+        stop_sell_prices (np.ndarray): sorted stop sell prices
+
+    Returns:
+        Tuple[int, int, int, int]: start of the triggered limit buys, end of
+            the triggered limit sells, end of the triggered stop buys and
+            start of the triggered stop sells
+    """
+    return (np.searchsorted(limit_buy_prices, price, side='left'),
+            np.searchsorted(limit_sell_prices, price, side='right'),
+            np.searchsorted(stop_buy_prices, price, side='right'),
+            np.searchsorted(stop_sell_prices, price, side='left'))
+
+
+@njit(cache=True)
+def fill_buys(price: float, budgets: np.ndarray, fee_mul: float,
+              fee_fixed: float) -> Tuple[np.ndarray, float, float]:
+    """settle buy orders filled at the same price
+
+    Args:
+        price (float): fill price
+        budgets (np.ndarray): budget of each order
+        fee_mul (float): multiplier applied to the budget
+        fee_fixed (float): fixed amount taken from the budget
+
+    Returns:
+        Tuple[np.ndarray, float, float]: bought quantity of each order,
+            total budget spent and total quantity bought
+    """
+    quantities = (budgets * fee_mul - fee_fixed) / price
+    return quantities, budgets.sum(), quantities.sum()
+
+
+@njit(cache=True)
+def fill_sells(price: float, quantities: np.ndarray, fee_mul: float,
+               fee_fixed: float) -> Tuple[float, float]:
+    """settle sell orders filled at the same price
+
+    Args:
+        price (float): fill price
+        quantities (np.ndarray): quantity of each order
+        fee_mul (float): multiplier applied to the proceeds
+        fee_fixed (float): fixed amount taken from the proceeds
+
+    Returns:
+        Tuple[float, float]: total quantity sold and total budget received
+    """
+    budgets = quantities * price * fee_mul - fee_fixed
+    return quantities.sum(), budgets.sum()
+
+
+@njit(cache=True)
+def next_trigger(ticks: np.ndarray, start: int,
+                 limit_buy_max: Union[int, float],
+                 limit_sell_min: Union[int, float],
+                 stop_buy_min: Union[int, float],
+                 stop_sell_max: Union[int, float]) -> int:
+    """find the first price at which any resting order triggers
+
+    Args:
+        ticks (np.ndarray): prices, in ticks if the bounds are ticks
+        start (int): index to search from
+        limit_buy_max (Union[int, float]): highest limit buy price
+        limit_sell_min (Union[int, float]): lowest limit sell price
+        stop_buy_min (Union[int, float]): lowest stop buy price
+        stop_sell_max (Union[int, float]): highest stop sell price
+
+    Returns:
+        int: index of the first triggering price, len(ticks) if none does
+    """
+    for i in range(start, len(ticks)):
+        tick = ticks[i]
+        if tick <= limit_buy_max or tick >= limit_sell_min or \
+                tick >= stop_buy_min or tick <= stop_sell_max:
+            return i
+    return len(ticks)
@@ -1,4 +1,4 @@
-from typing import List, Union, Callable
+from typing import Iterable, Union, Callable
 
 from ethtrade.order import Order, FilledOrder
 
@@ -6,6 +6,8 @@ from ethtrade.order import Order, FilledOrder
 class Portfolio:
     """Base class for Portfolio"""
 
+    __slots__ = ('security',)
+
     def __init__(self, security: str):
         """construct portfolio for a security
 
@@ -150,14 +152,27 @@ class Portfolio:
         """
         raise NotImplementedError
 
-    def get_order_ids(self) -> List[str]:
+    def get_order_ids(self) -> Iterable[str]:
         """get all place order ids for this portfolio
 
         Raises:
             NotImplementedError: must be implemented by subclass
 
         Returns:
-            List[str]: list of placed order ids for this portfolio
+            Iterable[str]: placed order ids for this portfolio, may be a
+                live view that must not be iterated while placing or
+                cancelling orders
+        """
+        raise NotImplementedError
+
+    def get_orders(self) -> Iterable[Order]:
+        """get all placed orders for this portfolio
+
+        Raises:
+            NotImplementedError: must be implemented by subclass
+
+        Returns:
+            Iterable[Order]: placed orders for this portfolio
         """
         raise NotImplementedError
 
@@ -191,3 +206,12 @@ class Portfolio:
 
     def step(self, price: float):
         raise NotImplementedError
+
+    def run(self, prices: Iterable[float]):
+        """step through a series of prices
+
+        Args:
+            prices (Iterable[float]): prices, oldest first
+        """
+        for price in prices:
+            self.step(float(price))
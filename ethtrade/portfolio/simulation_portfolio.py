@@ -1,118 +1,463 @@
-from uuid import uuid4
-from typing import Union, List, Dict, Tuple, Callable
+import logging
+from numbers import Integral, Real
+from math import isclose, inf
+from itertools import chain, count
+from typing import Union, List, Dict, Tuple, Callable, Iterator, Optional, \
+    KeysView
+import numpy as np
 
 from ethtrade.order import Order, FilledOrder, BuyOrder, SellOrder, \
-    MarketOrder, LimitOrder, StopOrder, MarketBuyOrder, MarketSellOrder, \
-    LimitBuyOrder, LimitSellOrder, StopBuyOrder, StopSellOrder
+    MarketBuyOrder, MarketSellOrder, LimitBuyOrder, LimitSellOrder, \
+    StopBuyOrder, StopSellOrder
 from ethtrade.portfolio import Portfolio
+from ethtrade.portfolio._kernels import trigger_bounds, fill_buys, \
+    fill_sells, next_trigger
+
+logger = logging.getLogger(__name__)
+
+# tick bounds of an empty order array, no price reaches them
+_NO_MAX = int(np.iinfo(np.int64).min)
+_NO_MIN = int(np.iinfo(np.int64).max)
+
+
+class _OrderQueue:
+    """Orders kept in placement order, keyed by id for O(1) removal"""
+
+    __slots__ = ('orders',)
+
+    def __init__(self):
+        self.orders: Dict[str, Order] = {}
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def __iter__(self) -> Iterator[Order]:
+        return iter(self.orders.values())
+
+    def insert(self, order: Order):
+        self.orders[order.order_id] = order
+
+    def remove(self, order: Order):
+        del self.orders[order.order_id]
+
+    def pop_all(self) -> List[Order]:
+        """remove and return all orders
+
+        Returns:
+            List[Order]: removed orders, in placement order
+        """
+        if not self.orders:
+            return []
+
+        orders = list(self.orders.values())
+        self.orders.clear()
+
+        return orders
+
+
+class _OrderArray:
+    """Resting orders of one kind, stored as an array of prices next to the
+    orders and kept sorted by price (then placement) so the orders that
+    trigger at a given price are a prefix or a suffix of the array. prices
+    are integer ticks when a tick size is given and the exact float prices
+    otherwise"""
+
+    __slots__ = ('price_attr', 'tick_size', 'prices', 'orders',
+                 'low', 'high', '_empty_bounds')
+
+    def __init__(self, price_attr: str, tick_size: Optional[float]):
+        """construct an empty order array
+
+        Args:
+            price_attr (str): order attribute the array is sorted on
+            tick_size (Optional[float]): price of one tick, prices are
+                compared exactly if None
+        """
+        self.price_attr = price_attr
+        self.tick_size = tick_size
+        self.prices: np.ndarray = np.empty(
+            0, dtype=np.float64 if tick_size is None else np.int64)
+        self.orders: List[Order] = []
+
+        # lowest and highest price as plain numbers, so checking whether a
+        # price can trigger anything needs no array access. an empty array
+        # has bounds no price reaches
+        self._empty_bounds: Tuple[Union[int, float], Union[int, float]] = \
+            (inf, -inf) if tick_size is None else (_NO_MIN, _NO_MAX)
+        self.low, self.high = self._empty_bounds
+
+    def _update_bounds(self):
+        if self.orders:
+            self.low = self.prices[0].item()
+            self.high = self.prices[-1].item()
+        else:
+            self.low, self.high = self._empty_bounds
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def _key(self, order: Order) -> Union[int, float]:
+        price = getattr(order, self.price_attr)
+        if self.tick_size is None:
+            return price
+        return round(price / self.tick_size)
+
+    def insert(self, order: Order):
+        price = self._key(order)
+        i = np.searchsorted(self.prices, price, side='right')
+        self.prices = np.insert(self.prices, i, price)
+        self.orders.insert(i, order)
+        self._update_bounds()
+
+    def remove(self, order: Order):
+        price = self._key(order)
+        start = np.searchsorted(self.prices, price, side='left')
+        end = np.searchsorted(self.prices, price, side='right')
+
+        for i in range(start, end):
+            if self.orders[i] is order:
+                self.prices = np.delete(self.prices, i)
+                del self.orders[i]
+                self._update_bounds()
+                return
+
+    def pop_head(self, k: int) -> List[Order]:
+        """remove and return the k lowest priced orders
+
+        Args:
+            k (int): number of orders to remove
+
+        Returns:
+            List[Order]: removed orders
+        """
+        if k == 0:
+            return []
+
+        orders = self.orders[:k]
+        del self.orders[:k]
+        self.prices = self.prices[k:]
+        self._update_bounds()
+
+        return orders
+
+    def pop_tail(self, k: int) -> List[Order]:
+        """remove and return the orders from index k on
+
+        Args:
+            k (int): index of the first order to remove
+
+        Returns:
+            List[Order]: removed orders
+        """
+        if k == len(self.orders):
+            return []
+
+        orders = self.orders[k:]
+        del self.orders[k:]
+        self.prices = self.prices[:k]
+        self._update_bounds()
+
+        return orders
+
+
+class _FillHistory:
+    """Fills stored as parallel arrays of step, price, quantity and side.
+    The arrays grow by doubling, or wrap around to keep only the latest
+    fills when a maximum length is given"""
+
+    __slots__ = ('steps', 'prices', 'quantities', 'is_buy', 'count',
+                 'maxlen')
+
+    def __init__(self, maxlen: Optional[int] = None, capacity: int = 1024):
+        """construct an empty fill history
+
+        Args:
+            maxlen (Optional[int], optional): number of latest fills to
+                keep, all fills are kept if None. Defaults to None.
+            capacity (int, optional): initial number of fills the arrays
+                hold. Defaults to 1024.
+        """
+        self.maxlen = maxlen
+        if maxlen is not None:
+            capacity = maxlen
+
+        self.steps: np.ndarray = np.empty(capacity, dtype=np.int64)
+        self.prices: np.ndarray = np.empty(capacity, dtype=np.float64)
+        self.quantities: np.ndarray = np.empty(capacity, dtype=np.float64)
+        self.is_buy: np.ndarray = np.empty(capacity, dtype=np.bool_)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count if self.maxlen is None else \
+            min(self.count, self.maxlen)
+
+    def _grow(self):
+        capacity = 2 * len(self.steps)
+        self.steps = np.resize(self.steps, capacity)
+        self.prices = np.resize(self.prices, capacity)
+        self.quantities = np.resize(self.quantities, capacity)
+        self.is_buy = np.resize(self.is_buy, capacity)
+
+    def append(self, step: int, price: float, quantity: float,
+               is_buy: bool):
+        if self.maxlen is None:
+            if self.count == len(self.steps):
+                self._grow()
+            i = self.count
+        elif self.maxlen == 0:
+            # a history size of 0 keeps no fills
+            return
+        else:
+            i = self.count % self.maxlen
+
+        self.steps[i] = step
+        self.prices[i] = price
+        self.quantities[i] = quantity
+        self.is_buy[i] = is_buy
+        self.count += 1
+
+    def clear(self):
+        self.count = 0
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray,
+                              np.ndarray]:
+        """the kept fills, oldest first
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: step,
+                price, quantity and whether the fill was a buy
+        """
+        arrays = (self.steps, self.prices, self.quantities, self.is_buy)
+
+        if self.maxlen is not None and self.count > self.maxlen:
+            shift = -(self.count % self.maxlen)
+            return tuple(np.roll(array, shift) for array in arrays)
+
+        n = len(self)
+        return tuple(array[:n] for array in arrays)
 
 
 class SimulationPortfolio(Portfolio):
+    # attributes are read on every fill and step, slots avoid the dict
+    __slots__ = ('budget', 'quantity', 'transaction_fee',
+                 '_apply_fee', '_unapply_fee',
+                 '_fee_mul', '_fee_div', '_fee_fixed',
+                 '_order_seq', 'order_book',
+                 'market_buy_orders', 'market_sell_orders',
+                 'limit_buy_orders', 'limit_sell_orders',
+                 'stop_buy_orders', 'stop_sell_orders', '_order_buckets',
+                 'tick_size', 'order_fill', 'index')
+
     def __init__(self, security: str, budget: float, quantity: float,
-                 transaction_fee: Union[int, float]):
+                 transaction_fee: Union[int, float],
+                 tick_size: Optional[float] = None,
+                 history_size: Optional[int] = None):
         super().__init__(security)
         self.budget: float = budget
         self.quantity: float = quantity
         self.transaction_fee: Union[int, float] = transaction_fee
-
+        # with a tick size, trigger prices are compared in whole ticks so
+        # prices that only differ by float rounding match. without one they
+        # are compared exactly
+        self.tick_size: Optional[float] = tick_size
+
+        # an integer fee is a fixed amount and any other real fee is a rate,
+        # the type never changes so the fee functions are picked once. the
+        # kernels apply either one as budget * _fee_mul - _fee_fixed
+        if isinstance(transaction_fee, Integral):
+            self._fee_mul = 1.0
+            self._fee_fixed = float(transaction_fee)
+            self._apply_fee = self._apply_fixed_fee
+            self._unapply_fee = self._unapply_fixed_fee
+        elif isinstance(transaction_fee, Real):
+            self._fee_mul = 1 - float(transaction_fee)
+            self._fee_fixed = 0.0
+            self._apply_fee = self._apply_rate_fee
+            self._unapply_fee = self._unapply_rate_fee
+        else:
+            raise TypeError(
+                f"transaction fee must be a real number, got "
+                f"{type(transaction_fee).__name__}")
+        self._fee_div = 1 / self._fee_mul
+
+        # ids only need to be unique within this portfolio, a counter is
+        # cheaper than uuid4 and keeps placement order visible
+        self._order_seq = count(1)
         self.order_book: Dict[str, Order] = {}
-        self.order_fill: List[Tuple[int, FilledOrder]] = []
+        self.market_buy_orders = _OrderQueue()
+        self.market_sell_orders = _OrderQueue()
+        self.limit_buy_orders = _OrderArray('limit_price', tick_size)
+        self.limit_sell_orders = _OrderArray('limit_price', tick_size)
+        self.stop_buy_orders = _OrderArray('stop_price', tick_size)
+        self.stop_sell_orders = _OrderArray('stop_price', tick_size)
+        # indexed by Order.KIND
+        self._order_buckets = (
+            self.market_buy_orders, self.market_sell_orders,
+            self.limit_buy_orders, self.limit_sell_orders,
+            self.stop_buy_orders, self.stop_sell_orders)
+        # fills are kept for analysis after the run, a history size bounds
+        # the memory of long runs by keeping only the latest fills
+        self.order_fill = _FillHistory(history_size)
 
         self.index = 0
 
-    def _apply_fee(self, budget: float) -> float:
-        if isinstance(self.transaction_fee, int):
-            return budget - self.transaction_fee
-        elif isinstance(self.transaction_fee, float):
-            return budget * (1 - self.transaction_fee)
+    def _apply_fixed_fee(self, budget: float) -> float:
+        return budget - self._fee_fixed
 
-    def _unapply_fee(self, budget: float) -> float:
-        if isinstance(self.transaction_fee, int):
-            return budget + self.transaction_fee
-        elif isinstance(self.transaction_fee, float):
-            return budget / (1 - self.transaction_fee)
+    def _unapply_fixed_fee(self, budget: float) -> float:
+        return budget + self._fee_fixed
 
-    def _fill_order(self, price, order: Order) -> FilledOrder:
-        if isinstance(order, BuyOrder):
-            budget = self._apply_fee(order.budget)
-            quantity = budget / price
+    def _apply_rate_fee(self, budget: float) -> float:
+        return budget * self._fee_mul
 
-            # print(
-            #     f"Bought {quantity:.4f} {self.security} at {price:.2f}")
+    def _unapply_rate_fee(self, budget: float) -> float:
+        return budget * self._fee_div
 
-            self.budget -= order.budget
-            self.quantity += quantity
+    def _fill_buy_order(self, price: float, order: BuyOrder) -> float:
+        budget = self._apply_fee(order.budget)
+        quantity = budget / price
 
-        elif isinstance(order, SellOrder):
-            quantity = order.quantity
-            budget = self._apply_fee(quantity * price)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Bought %.4f %s at %.2f", quantity, self.security, price)
 
-            # print(
-            #     f"Sold {quantity:.4f} {self.security} at {price:.2f}")
+        self.budget -= order.budget
+        self.quantity += quantity
 
-            self.quantity -= quantity
-            self.budget += budget
+        return quantity
 
-        filled_order = FilledOrder(order, price, quantity)
-        order.fill_handler(filled_order)
+    def _fill_sell_order(self, price: float, order: SellOrder) -> float:
+        quantity = order.quantity
+        budget = self._apply_fee(quantity * price)
 
-        return filled_order
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Sold %.4f %s at %.2f", quantity, self.security, price)
 
-    def place_market_buy_order(self, budget: float,
-                               fill_handler: Callable[
-                                   [FilledOrder], None]) -> str:
-        order_id = str(uuid4())
-        order = MarketBuyOrder(order_id, fill_handler, budget)
+        self.quantity -= quantity
+        self.budget += budget
+
+        return quantity
+
+    def _fill_buy_orders(self, price: float,
+                         orders: List[BuyOrder]) -> List[float]:
+        if len(orders) < 2:
+            return [self._fill_buy_order(price, order) for order in orders]
+
+        # several orders fill at the same price, settle them in one go
+        budgets = np.fromiter((order.budget for order in orders),
+                              dtype=np.float64, count=len(orders))
+        quantities, budget, quantity = fill_buys(
+            price, budgets, self._fee_mul, self._fee_fixed)
+
+        self.budget -= float(budget)
+        self.quantity += float(quantity)
+
+        quantities = quantities.tolist()
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for quantity in quantities:
+                logger.debug("Bought %.4f %s at %.2f",
+                             quantity, self.security, price)
+
+        return quantities
+
+    def _fill_sell_orders(self, price: float,
+                          orders: List[SellOrder]) -> List[float]:
+        if len(orders) < 2:
+            return [self._fill_sell_order(price, order) for order in orders]
+
+        # several orders fill at the same price, settle them in one go
+        quantities = np.fromiter((order.quantity for order in orders),
+                                 dtype=np.float64, count=len(orders))
+        quantity, budget = fill_sells(
+            price, quantities, self._fee_mul, self._fee_fixed)
+
+        self.quantity -= float(quantity)
+        self.budget += float(budget)
+
+        quantities = [order.quantity for order in orders]
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for quantity in quantities:
+                logger.debug("Sold %.4f %s at %.2f",
+                             quantity, self.security, price)
+
+        return quantities
+
+    def _run_fill_handlers(self, filled_orders: List[FilledOrder]):
+        # handlers marked with batch_fill_handler get every order they
+        # filled on this step in a single call, grouped by the marked
+        # handler itself
+        batches: Dict[Callable, List[FilledOrder]] = {}
+
+        for filled_order in filled_orders:
+            fill_handler = filled_order.order.fill_handler
+            if getattr(fill_handler, 'batched', False):
+                batches.setdefault(fill_handler, []).append(filled_order)
+            else:
+                fill_handler(filled_order)
+
+        for fill_handler, batch in batches.items():
+            fill_handler(batch)
+
+    def _check_ticks(self, *prices: float):
+        if self.tick_size is None:
+            return
+
+        for price in prices:
+            ticks = price / self.tick_size
+            if not isclose(ticks, round(ticks), rel_tol=1e-9, abs_tol=1e-6):
+                raise ValueError(
+                    f"price {price} is not a multiple of the tick size "
+                    f"{self.tick_size}")
+
+    def _place_order(self, order_type: type, fill_handler: Callable[
+            [FilledOrder], None], *args) -> str:
+        order_id = format(next(self._order_seq), 'x')
+        order = order_type(order_id, fill_handler, *args)
         self.order_book[order_id] = order
+        self._order_buckets[order_type.KIND].insert(order)
 
         return order_id
 
+    def place_market_buy_order(self, budget: float,
+                               fill_handler: Callable[
+                                   [FilledOrder], None]) -> str:
+        return self._place_order(MarketBuyOrder, fill_handler, budget)
+
     def place_limit_buy_order(self, limit_price: float, budget: float,
                               fill_handler: Callable[
                                   [FilledOrder], None]) -> str:
-        order_id = str(uuid4())
-        order = LimitBuyOrder(order_id, fill_handler, budget, limit_price)
-        self.order_book[order_id] = order
-
-        return order_id
+        self._check_ticks(limit_price)
+        return self._place_order(
+            LimitBuyOrder, fill_handler, budget, limit_price)
 
     def place_stop_buy_order(self, stop_price: float, limit_price: float,
                              budget: float, fill_handler: Callable[
                                  [FilledOrder], None]) -> str:
-        order_id = str(uuid4())
-        order = StopBuyOrder(order_id, fill_handler,
-                             budget, stop_price, limit_price)
-        self.order_book[order_id] = order
-
-        return order_id
+        self._check_ticks(stop_price, limit_price)
+        return self._place_order(
+            StopBuyOrder, fill_handler, budget, stop_price, limit_price)
 
     def place_market_sell_order(self, quantity: float,
                                 fill_handler: Callable[
                                     [FilledOrder], None]) -> str:
-        order_id = str(uuid4())
-        order = MarketSellOrder(order_id, fill_handler, quantity)
-        self.order_book[order_id] = order
-
-        return order_id
+        return self._place_order(MarketSellOrder, fill_handler, quantity)
 
     def place_limit_sell_order(self, limit_price: float, quantity: float,
                                fill_handler: Callable[[
                                    FilledOrder], None]) -> str:
-        order_id = str(uuid4())
-        order = LimitSellOrder(order_id, fill_handler, quantity, limit_price)
-        self.order_book[order_id] = order
-
-        return order_id
+        self._check_ticks(limit_price)
+        return self._place_order(
+            LimitSellOrder, fill_handler, quantity, limit_price)
 
     def place_stop_sell_order(self, stop_price: float, limit_price: float,
                               quantity: float, fill_handler: Callable[
                                   [FilledOrder], None]) -> str:
-        order_id = str(uuid4())
-        order = StopSellOrder(order_id, fill_handler,
-                              quantity, stop_price, limit_price)
-        self.order_book[order_id] = order
-
-        return order_id
+        self._check_ticks(stop_price, limit_price)
+        return self._place_order(
+            StopSellOrder, fill_handler, quantity, stop_price, limit_price)
 
     def get_budget(self) -> float:
         return self.budget
@@ -120,15 +465,23 @@ class SimulationPortfolio(Portfolio):
     def get_quantity(self) -> float:
         return self.quantity
 
-    def get_order_ids(self) -> List[str]:
-        return list(self.order_book)
+    def get_order_ids(self) -> KeysView[str]:
+        return self.order_book.keys()
 
     def get_order_by_id(self, order_id: str) -> Union[Order, None]:
         return self.order_book[order_id]
 
+    def get_orders(self) -> Iterator[Order]:
+        return chain(self.market_buy_orders, self.market_sell_orders,
+                     self.limit_buy_orders.orders,
+                     self.limit_sell_orders.orders,
+                     self.stop_buy_orders.orders,
+                     self.stop_sell_orders.orders)
+
     def cancel_order(self, order_id: str):
-        if order_id in self.order_book:
-            del self.order_book[order_id]
+        order = self.order_book.pop(order_id, None)
+        if order is not None:
+            self._order_buckets[order.KIND].remove(order)
 
     def reset(self, price: float):
         # self.order_book.clear()
@@ -136,38 +489,121 @@ class SimulationPortfolio(Portfolio):
         self.index = 0
 
     def step(self, price: float):
-        for order_id in self.get_order_ids():
-            order = self.get_order_by_id(order_id)
-
-            if isinstance(order, MarketOrder):
-                filled_order = self._fill_order(price, order)
-                del self.order_book[order_id]
-                self.order_fill.append((self.index, filled_order))
-
-            elif isinstance(order, LimitOrder):
-                if (isinstance(order, BuyOrder) and price <= order.limit_price) or \
-                        (isinstance(order, SellOrder) and price >= order.limit_price):
-                    filled_order = self._fill_order(price, order)
-                    del self.order_book[order_id]
-                    self.order_fill.append((self.index, filled_order))
-
-            elif isinstance(order, StopOrder):
-                if isinstance(order, BuyOrder):
-                    if price >= order.stop_price:
-                        new_order = LimitBuyOrder(
-                            order.order_id,
-                            order.fill_handler,
-                            order.budget,
-                            order.limit_price)
-                        self.order_book[new_order.order_id] = new_order
-
-                elif isinstance(order, SellOrder):
-                    if price <= order.stop_price:
-                        new_order = LimitSellOrder(
-                            order.order_id,
-                            order.fill_handler,
-                            order.quantity,
-                            order.limit_price)
-                        self.order_book[new_order.order_id] = new_order
+        tick = price if self.tick_size is None else \
+            round(price / self.tick_size)
+
+        # most steps trigger nothing, rule that out on the cached bounds
+        # before searching the arrays
+        if not (self.market_buy_orders.orders or
+                self.market_sell_orders.orders) and \
+                self.limit_buy_orders.high < tick and \
+                self.limit_sell_orders.low > tick and \
+                self.stop_buy_orders.low > tick and \
+                self.stop_sell_orders.high < tick:
+            self.index += 1
+            return
+
+        market_buy_orders = self.market_buy_orders.pop_all()
+        market_sell_orders = self.market_sell_orders.pop_all()
+
+        limit_buy_start, limit_sell_end, stop_buy_end, stop_sell_start = \
+            trigger_bounds(tick,
+                           self.limit_buy_orders.prices,
+                           self.limit_sell_orders.prices,
+                           self.stop_buy_orders.prices,
+                           self.stop_sell_orders.prices)
+
+        limit_buy_orders = self.limit_buy_orders.pop_tail(limit_buy_start)
+        limit_sell_orders = self.limit_sell_orders.pop_head(limit_sell_end)
+
+        # triggered stop orders become limit orders, matched from the next
+        # step on
+        for order in self.stop_buy_orders.pop_head(stop_buy_end):
+            new_order = LimitBuyOrder(
+                order.order_id,
+                order.fill_handler,
+                order.budget,
+                order.limit_price)
+            self.order_book[new_order.order_id] = new_order
+            self.limit_buy_orders.insert(new_order)
+
+        for order in self.stop_sell_orders.pop_tail(stop_sell_start):
+            new_order = LimitSellOrder(
+                order.order_id,
+                order.fill_handler,
+                order.quantity,
+                order.limit_price)
+            self.order_book[new_order.order_id] = new_order
+            self.limit_sell_orders.insert(new_order)
+
+        # most steps fill nothing, skip building the fill lists
+        if not (market_buy_orders or limit_buy_orders or
+                market_sell_orders or limit_sell_orders):
+            self.index += 1
+            return
+
+        buy_orders = market_buy_orders + limit_buy_orders
+        sell_orders = market_sell_orders + limit_sell_orders
+
+        # remove filled orders before running fill handlers, orders placed
+        # by the handlers are only matched from the next step on
+        for order in chain(buy_orders, sell_orders):
+            del self.order_book[order.order_id]
+
+        buy_quantities = self._fill_buy_orders(price, buy_orders)
+        sell_quantities = self._fill_sell_orders(price, sell_orders)
+
+        for quantity in buy_quantities:
+            self.order_fill.append(self.index, price, quantity, True)
+        for quantity in sell_quantities:
+            self.order_fill.append(self.index, price, quantity, False)
+
+        # the history keeps the quantities, only orders with a fill handler
+        # need a filled order built for them
+        filled_orders = [
+            FilledOrder(order, price, quantity) for order, quantity in zip(
+                chain(buy_orders, sell_orders),
+                chain(buy_quantities, sell_quantities))
+            if order.fill_handler is not None]
+
+        if filled_orders:
+            self._run_fill_handlers(filled_orders)
 
         self.index += 1
+
+    def run(self, prices: np.ndarray):
+        """step through a series of prices, skipping the prices at which no
+        order can trigger
+
+        Args:
+            prices (np.ndarray): prices, oldest first
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if self.tick_size is None:
+            ticks = prices
+        else:
+            ticks = np.rint(prices / self.tick_size).astype(np.int64)
+        n = len(prices)
+        i = 0
+
+        while i < n:
+            if self.market_buy_orders or self.market_sell_orders:
+                j = i
+            else:
+                # bounds of the resting orders, an empty array never
+                # triggers. fill handlers may place orders, so they are
+                # read again after every step
+                j = next_trigger(
+                    ticks, i,
+                    self.limit_buy_orders.high,
+                    self.limit_sell_orders.low,
+                    self.stop_buy_orders.low,
+                    self.stop_sell_orders.high)
+
+                # nothing fills on the skipped prices
+                self.index += j - i
+                if j == n:
+                    break
+
+            self.step(float(prices[j]))
+            i = j + 1
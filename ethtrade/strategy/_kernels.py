@@ -0,0 +1,45 @@
+import numpy as np
+
+from ethtrade._jit import njit
+
+
+@njit(cache=True)
+def walk(index: int, price: float, lower_bounds: np.ndarray,
+         upper_bounds: np.ndarray) -> int:
+    """walk from a level to the level containing price
+
+    Args:
+        index (int): index of the starting level
+        price (float): current price
+        lower_bounds (np.ndarray): lower bound of each level
+        upper_bounds (np.ndarray): upper bound of each level
+
+    Returns:
+        int: index of the level containing price
+    """
+    while price > upper_bounds[index]:
+        index += 1
+    while price < lower_bounds[index]:
+        index -= 1
+    return index
+
+
+@njit(cache=True)
+def advance(index: int, prices: np.ndarray, lower_bounds: np.ndarray,
+            upper_bounds: np.ndarray) -> np.ndarray:
+    """walk through the levels along a price series
+
+    Args:
+        index (int): index of the starting level
+        prices (np.ndarray): price series
+        lower_bounds (np.ndarray): lower bound of each level
+        upper_bounds (np.ndarray): upper bound of each level
+
+    Returns:
+        np.ndarray: index of the level containing each price
+    """
+    indices = np.empty(len(prices), dtype=np.int64)
+    for i in range(len(prices)):
+        index = walk(index, prices[i], lower_bounds, upper_bounds)
+        indices[i] = index
+    return indices
@@ -1,88 +1,97 @@
 from __future__ import annotations
-from dataclasses import dataclass, field
 from typing import List, Dict
-from math import inf
+import numpy as np
 
-from ethtrade.order import FilledOrder, SellOrder
+from ethtrade.order import FilledOrder
 from ethtrade.portfolio.portfolio import Portfolio
 from ethtrade.strategy import Strategy
+from ethtrade.strategy._kernels import walk, advance
 
-
-@dataclass
-class Level:
-    budget: float
-    quantity: int
-    lower_bound: float
-    upper_bound: float
-    order_ids: List[str] = field(default_factory=list)
-    next: Level = None
-    prev: Level = None
+# bounds of the open ended levels below and above the grid. the upper one is
+# the largest finite float rather than inf, so the level walk stays correct
+# if the kernels are ever compiled with fastmath, which assumes no infinities
+LOWER_SENTINEL = 0.0
+UPPER_SENTINEL = float(np.finfo(np.float64).max)
 
 
 class GridStrategy(Strategy):
+    # the level state is read on every price, slots avoid the dict
+    __slots__ = ('order_id_to_level_map', 'lower', 'upper', 'budgets',
+                 'quantities', 'order_ids', 'current_idx',
+                 '_current_lower', '_current_upper')
+
     def __init__(self, portfolio: Portfolio, levels: List[float]):
         super().__init__(portfolio)
-        self.order_id_to_level_map: Dict[str, Level] = {}
+        self.order_id_to_level_map: Dict[str, int] = {}
 
-        self._construct_linked_list(levels)
+        self._construct_levels(levels)
 
-    def _construct_linked_list(self, levels: List[float]):
+    def _construct_levels(self, levels: List[float]):
         n = len(levels) - 1
 
-        self.current_level = Level(0, 0, 0, levels[0])
+        # level i spans [lower[i], upper[i]]; level 0 and level n + 1 are the
+        # open ended levels below and above the grid
+        self.lower = np.full(n + 2, LOWER_SENTINEL, dtype=np.float64)
+        self.upper = np.full(n + 2, UPPER_SENTINEL, dtype=np.float64)
+        self.lower[1:] = levels
+        self.upper[:-1] = levels
 
-        for i in range(n):
-            budget = self.portfolio.budget / n
+        self.budgets = np.zeros(n + 2, dtype=np.float64)
+        self.quantities = np.zeros(n + 2, dtype=np.float64)
+        self.order_ids: List[List[str]] = [[] for _ in range(n + 2)]
 
-            self.current_level.next = Level(
-                budget, 0, levels[i], levels[i + 1])
-            self.current_level.next.prev = self.current_level
-            self.current_level = self.current_level.next
+        budget = self.portfolio.budget / n
+        self.budgets[1:-1] = budget
 
+        for i in range(1, n + 1):
             # place orders
             order_id = self.portfolio.place_stop_buy_order(
-                levels[i] - 50, levels[i], budget, self._buy_callback)
-            self.order_id_to_level_map[order_id] = self.current_level
-            self.current_level.order_ids.append(order_id)
+                levels[i - 1] - 50, levels[i - 1], budget, self._buy_callback)
+            self.order_id_to_level_map[order_id] = i
+            self.order_ids[i].append(order_id)
 
-        self.current_level.next = Level(0, 0, levels[n], inf)
-        self.current_level.next.prev = self.current_level
+        self._set_level(n)
+
+    def _set_level(self, idx: int):
+        self.current_idx = idx
+        # bounds of the current level as plain floats, step compares every
+        # price against them
+        self._current_lower = float(self.lower[idx])
+        self._current_upper = float(self.upper[idx])
 
     def _buy_callback(self, filled_order: FilledOrder):
-        level = self.order_id_to_level_map[filled_order.order.order_id]
-        level.budget -= filled_order.order.budget
-        level.quantity += filled_order.quantity
+        order_id = filled_order.order.order_id
+        idx = self.order_id_to_level_map.pop(order_id)
+        self.budgets[idx] -= filled_order.order.budget
+        self.quantities[idx] += filled_order.quantity
 
-        del self.order_id_to_level_map[filled_order.order.order_id]
-        level.order_ids.remove(filled_order.order.order_id)
+        self.order_ids[idx].remove(order_id)
 
     def _sell_callback(self, filled_order: FilledOrder):
-        level = self.order_id_to_level_map[filled_order.order.order_id]
-        level.budget += filled_order.price * filled_order.quantity
-        level.quantity -= filled_order.quantity
+        order_id = filled_order.order.order_id
+        idx = self.order_id_to_level_map.pop(order_id)
+        quantity = filled_order.quantity
+        self.budgets[idx] += filled_order.price * quantity
+        self.quantities[idx] -= quantity
 
-        del self.order_id_to_level_map[filled_order.order.order_id]
-        level.order_ids.remove(filled_order.order.order_id)
+        order_ids = self.order_ids[idx]
+        order_ids.remove(order_id)
 
         order_id = self.portfolio.place_limit_buy_order(
-            level.lower_bound, level.budget, self._buy_callback)
-        self.order_id_to_level_map[order_id] = level
-        level.order_ids.append(order_id)
-
-    def _next_level(self):
-        self.current_level = self.current_level.next
+            float(self.lower[idx]), float(self.budgets[idx]),
+            self._buy_callback)
+        self.order_id_to_level_map[order_id] = idx
+        order_ids.append(order_id)
 
-    def _prev_level(self):
-        self.current_level = self.current_level.prev
+    def _walk_to_level(self, price: float):
+        self._set_level(
+            walk(self.current_idx, price, self.lower, self.upper))
 
     def reset(self, price: float):
-        if price > self.current_level.upper_bound:
-            while price > self.current_level.next.upper_bound:
-                self._next_level()
-
-        elif price < self.current_level.lower_bound:
-            while price < self.current_level.prev.lower_bound:
-                self._prev_level()
+        # the price may be anywhere after a reset, search the bounds instead
+        # of walking level by level
+        self._set_level(
+            int(np.searchsorted(self.upper, price, side='right')))
 
         self.portfolio.reset(price)
 
@@ -93,55 +102,89 @@ class GridStrategy(Strategy):
         ...
 
     def _handle_rising_leaving_level(self, price: float):
-        level = self.current_level
-
-        while level.prev is not None:
-            remaining_quantity = level.quantity
-
-            for order_id in level.order_ids:
-                order = self.portfolio.get_order_by_id(order_id)
-                if isinstance(order, SellOrder):
-                    self.portfolio.cancel_order(order_id)
-
-                    del self.order_id_to_level_map[order_id]
-                    level.order_ids.remove(order_id)
-
-                    order_id = self.portfolio.place_stop_sell_order(
-                        level.upper_bound + 50, level.upper_bound,
+        # bound once, the loop below runs for every level under the price
+        portfolio = self.portfolio
+        level_map = self.order_id_to_level_map
+        upper = self.upper.tolist()
+        quantities = self.quantities.tolist()
+
+        idx = self.current_idx
+
+        while idx > 0:
+            upper_bound = upper[idx]
+            remaining_quantity = quantities[idx]
+
+            # build the new id list in one pass instead of removing from and
+            # appending to the list being iterated
+            order_ids = []
+            for order_id in self.order_ids[idx]:
+                order = portfolio.get_order_by_id(order_id)
+                if not order.IS_BUY:
+                    portfolio.cancel_order(order_id)
+                    del level_map[order_id]
+
+                    order_id = portfolio.place_stop_sell_order(
+                        upper_bound + 50, upper_bound,
                         order.quantity, order.fill_handler)
-                    self.order_id_to_level_map[order_id] = level
-                    level.order_ids.append(order_id)
+                    level_map[order_id] = idx
 
                     remaining_quantity -= order.quantity
 
+                order_ids.append(order_id)
+
             if remaining_quantity > 0:
-                order_id = self.portfolio.place_stop_sell_order(
-                    level.upper_bound + 50, level.upper_bound,
+                order_id = portfolio.place_stop_sell_order(
+                    upper_bound + 50, upper_bound,
                     remaining_quantity, self._sell_callback)
-                self.order_id_to_level_map[order_id] = level
-                level.order_ids.append(order_id)
+                level_map[order_id] = idx
+                order_ids.append(order_id)
 
-            level = level.prev
+            self.order_ids[idx] = order_ids
+
+            idx -= 1
         ...
 
     def _handle_falling_leaving_level(self, price: float):
         ...
 
     def step(self, price: float):
-        if price > self.current_level.upper_bound:
+        if price > self._current_upper:
             self._handle_rising_leaving_level(price)
-
-            while price > self.current_level.upper_bound:
-                self._next_level()
-
+            self._walk_to_level(price)
             self._handle_rising_entering_level(price)
 
-        elif price < self.current_level.lower_bound:
+        elif price < self._current_lower:
             self._handle_falling_leaving_level(price)
-
-            while price < self.current_level.lower_bound:
-                self._prev_level()
-
+            self._walk_to_level(price)
             self._handle_falling_entering_level(price)
 
         self.portfolio.step(price)
+
+    def run(self, prices: np.ndarray):
+        # the levels never move, so the level of every price is found in one
+        # compiled pass and the handlers only run where the level changes.
+        # the portfolio runs through the prices in between on its own
+        prices = np.asarray(prices, dtype=np.float64)
+        indices = advance(self.current_idx, prices, self.lower, self.upper)
+        changes = np.flatnonzero(np.diff(indices, prepend=self.current_idx))
+
+        start = 0
+        for i in changes.tolist():
+            self.portfolio.run(prices[start:i])
+
+            price = float(prices[i])
+            index = int(indices[i])
+            if index > self.current_idx:
+                self._handle_rising_leaving_level(price)
+                self._set_level(index)
+                self._handle_rising_entering_level(price)
+
+            else:
+                self._handle_falling_leaving_level(price)
+                self._set_level(index)
+                self._handle_falling_entering_level(price)
+
+            self.portfolio.step(price)
+            start = i + 1
+
+        self.portfolio.run(prices[start:])
@@ -1,9 +1,13 @@
+from typing import Iterable
+
 from ethtrade.portfolio import Portfolio
 
 
 class Strategy:
     """Base strategy class"""
 
+    __slots__ = ('portfolio',)
+
     def __init__(self, portfolio: Portfolio):
         self.portfolio = portfolio
 
@@ -12,3 +16,7 @@ class Strategy:
 
     def step(self, price: float):
         raise NotImplementedError
+
+    def run(self, prices: Iterable[float]):
+        for price in prices:
+            self.step(float(price))
@@ -1,50 +1,87 @@
 from __future__ import annotations
-from matplotlib import pyplot as plt
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Iterable, List, Optional, Tuple
+import os
 import pandas as pd
 import numpy as np
 
 from ethtrade.portfolio import SimulationPortfolio
-from ethtrade.order import BuyOrder, SellOrder
 from ethtrade.strategy import GridStrategy
 
 
-def main():
+def load_data() -> pd.DataFrame:
+    # only the close is used, skip parsing the other columns
+    df = pd.read_csv('data/Bitstamp_ETHUSD_1h.csv', usecols=['date', 'close'],
+                     dtype={'close': np.float64}, parse_dates=['date'])
+    df = df.set_index('date').sort_index()
+
+    # the index is sorted, slice from the first row after the start date
+    # instead of building a boolean mask over every row
+    start = df.index.searchsorted(pd.Timestamp('2021-06-20'), side='right')
+    df = df.iloc[start:]
+    # df = df[df.index > '2021-08-19']
+    # df = df[df.index < '2021-08-25']
+
+    return df
+
+
+def run_backtest(closes: np.ndarray, pct: float = 1.05, base: float = 3000.0,
+                 n_levels: int = 5) -> Tuple[SimulationPortfolio, np.ndarray]:
     portfolio = SimulationPortfolio('ETC-USD', 10000, 0, 0.005)
 
-    pct = 1.05
-    levels = np.cumprod(np.ones(5) * pct) * 3000 / pct
+    levels = base * pct ** np.arange(n_levels, dtype=np.float64)
     strategy = GridStrategy(portfolio, levels)
 
-    df = pd.read_csv('data/Bitstamp_ETHUSD_1h.csv')
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.set_index('date').sort_index()
+    strategy.reset(float(closes[0]))
 
-    df = df[df.index > '2021-06-20']
-    # df = df[df.index > '2021-08-19']
-    # df = df[df.index < '2021-08-25']
+    strategy.run(closes)
 
-    strategy.reset(df.iloc[0].close)
+    return portfolio, levels
 
-    for i in range(len(df)):
-        strategy.step(df.iloc[i]['close'])
-    print("Networth:", portfolio.budget +
-          portfolio.quantity * df.iloc[i]['close'])
+
+# closes of the sweep, set once per worker process so the array is not sent
+# along with every parameter set
+_closes: Optional[np.ndarray] = None
+
+
+def _init_worker(closes: np.ndarray):
+    global _closes
+    _closes = closes
+
+
+def _networth(params: Tuple[float, float, int]) -> float:
+    portfolio, _ = run_backtest(_closes, *params)
+    return portfolio.budget + portfolio.quantity * float(_closes[-1])
+
+
+def grid_search(closes: np.ndarray,
+                params: Iterable[Tuple[float, float, int]],
+                max_workers: Optional[int] = None) -> List[float]:
+    # every parameter set is an independent backtest, run them on all cores
+    params = list(params)
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(params) // (4 * workers))
+
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker,
+                             initargs=(closes,)) as pool:
+        return list(pool.map(_networth, params, chunksize=chunksize))
+
+
+def plot_results(df: pd.DataFrame, portfolio: SimulationPortfolio,
+                 levels: np.ndarray):
+    # matplotlib is slow to import, only load it when plotting
+    from matplotlib import pyplot as plt
 
     domain = range(len(df))
 
     plt.plot(domain, df['close'])
 
-    buy_orders = []
-    sell_orders = []
+    steps, prices, _, is_buy = portfolio.order_fill.arrays()
 
-    for step, filled_order in portfolio.order_fill:
-        if isinstance(filled_order.order, BuyOrder):
-            buy_orders.append([step, filled_order.price])
-        elif isinstance(filled_order.order, SellOrder):
-            sell_orders.append([step, filled_order.price])
-
-    plt.scatter(*zip(*buy_orders), c='r', s=100, marker='v')
-    plt.scatter(*zip(*sell_orders), c='g', s=100, marker='^')
+    plt.scatter(steps[is_buy], prices[is_buy], c='r', s=100, marker='v')
+    plt.scatter(steps[~is_buy], prices[~is_buy], c='g', s=100, marker='^')
 
     for level in levels:
         plt.axhline(level, color='k', alpha=0.1, linestyle='--')
@@ -52,5 +89,35 @@ def main():
     plt.show()
 
 
+def sweep(closes: np.ndarray):
+    params = list(product((1.01, 1.02, 1.03, 1.05), (2500.0, 3000.0),
+                          (5, 10)))
+
+    results = grid_search(closes, params)
+    for (pct, base, n_levels), result in sorted(
+            zip(params, results), key=lambda x: x[1], reverse=True):
+        print(f"pct={pct} base={base} levels={n_levels}: {result}")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--sweep', action='store_true',
+                        help='backtest a range of grid parameters')
+    args = parser.parse_args()
+
+    df = load_data()
+    closes = df['close'].to_numpy(dtype=np.float64)
+
+    if args.sweep:
+        sweep(closes)
+        return
+
+    portfolio, levels = run_backtest(closes)
+    print("Networth:", portfolio.budget +
+          portfolio.quantity * closes[-1])
+
+    plot_results(df, portfolio, levels)
+
+
 if __name__ == '__main__':
     main()
@@ -1,6 +1,9 @@
 import unittest
 from unittest import TestCase
 
+import numpy as np
+
+from ethtrade.order import FilledOrder, batch_fill_handler
 from ethtrade.portfolio import SimulationPortfolio
 
 
@@ -40,6 +43,19 @@ class TestSimulationPortfolio(TestCase):
         self.assertEqual(portfolio.get_budget(), 0)
         self.assertEqual(portfolio.get_quantity(), 1000 * 0.995 / 3284.59)
 
+    def test_fixed_fee_types(self):
+        # any integer is a fixed fee, numpy integers included
+        for fee in (5, np.int64(5)):
+            portfolio = SimulationPortfolio('ETH-USDC', 1000, 0, fee)
+            portfolio.reset(100)
+            portfolio.place_market_buy_order(1000, lambda x: None)
+            portfolio.step(100)
+
+            self.assertEqual(portfolio.get_quantity(), 9.95)
+
+        with self.assertRaises(TypeError):
+            SimulationPortfolio('ETH-USDC', 1000, 0, '0.005')
+
     def test_place_limit_buy_order(self):
         portfolio = SimulationPortfolio('ETH-USDC', 1000, 0, 0.005)
         portfolio.reset(self.prices[0])
@@ -65,3 +81,190 @@ class TestSimulationPortfolio(TestCase):
 
         self.assertEqual(portfolio.get_budget(), 0)
         self.assertEqual(portfolio.get_quantity(), 1000 * 0.995 / 3166.78)
+
+    def test_cancel_order(self):
+        portfolio = SimulationPortfolio('ETH-USDC', 1000, 0, 0.005)
+        portfolio.reset(self.prices[0])
+
+        order_id = portfolio.place_limit_buy_order(
+            3000, portfolio.get_budget(), lambda x: None)
+        portfolio.place_stop_buy_order(
+            3250, 3200, portfolio.get_budget(), lambda x: None)
+        portfolio.cancel_order(order_id)
+
+        for price in self.prices:
+            portfolio.step(price)
+
+        self.assertEqual(portfolio.get_budget(), 0)
+        self.assertEqual(portfolio.get_quantity(), 1000 * 0.995 / 3166.78)
+
+    def test_fill_orders_on_same_step(self):
+        portfolio = SimulationPortfolio('ETH-USDC', 1000, 0, 0.005)
+        portfolio.reset(self.prices[0])
+
+        portfolio.place_limit_buy_order(3000, 600, lambda x: None)
+        portfolio.place_limit_buy_order(2990, 400, lambda x: None)
+
+        for price in self.prices:
+            portfolio.step(price)
+
+        self.assertEqual(len(portfolio.order_fill), 2)
+        self.assertAlmostEqual(portfolio.get_budget(), 0)
+        self.assertAlmostEqual(portfolio.get_quantity(),
+                               1000 * 0.995 / 2966.4)
+
+    def test_cancel_market_order(self):
+        portfolio = SimulationPortfolio('ETH-USDC', 1000, 0, 0.005)
+        portfolio.reset(self.prices[0])
+
+        order_id = portfolio.place_market_buy_order(
+            portfolio.get_budget(), lambda x: None)
+        portfolio.cancel_order(order_id)
+        portfolio.step(self.prices[0])
+
+        self.assertEqual(portfolio.get_budget(), 1000)
+        self.assertEqual(portfolio.get_quantity(), 0)
+        self.assertEqual(list(portfolio.get_orders()), [])
+
+    def test_batch_fill_handler(self):
+        portfolio = SimulationPortfolio('ETH-USDC', 1000, 0, 0.005)
+        portfolio.reset(self.prices[0])
+        calls = []
+
+        @batch_fill_handler
+        def fill_handler(filled_orders):
+            calls.append(len(filled_orders))
+
+        portfolio.place_limit_buy_order(3000, 500, fill_handler)
+        portfolio.place_limit_buy_order(2990, 500, fill_handler)
+
+        for price in self.prices:
+            portfolio.step(price)
+
+        self.assertEqual(calls, [2])
+
+    def test_batch_fill_handler_bound_method(self):
+        class Handler:
+            def __init__(self):
+                self.calls = []
+
+            def on_fill(self, filled_orders):
+                self.calls.append(filled_orders)
+
+        portfolio = SimulationPortfolio('ETH-USDC', 1500, 0, 0.005)
+        portfolio.reset(self.prices[0])
+        marked, unmarked = Handler(), Handler()
+        fill_handler = batch_fill_handler(marked.on_fill)
+
+        portfolio.place_limit_buy_order(3000, 500, fill_handler)
+        portfolio.place_limit_buy_order(2990, 500, fill_handler)
+        portfolio.place_limit_buy_order(2980, 500, unmarked.on_fill)
+
+        for price in self.prices:
+            portfolio.step(price)
+
+        # only the marked instance is batched, the other instance of the
+        # class still gets one filled order per call
+        self.assertEqual([len(call) for call in marked.calls], [2])
+        self.assertEqual(len(unmarked.calls), 1)
+        self.assertIsInstance(unmarked.calls[0], FilledOrder)
+
+    def test_limit_price_in_ticks(self):
+        portfolio = SimulationPortfolio('ETH-USDC', 0, 10, 0.005,
+                                        tick_size=0.01)
+        portfolio.reset(0.3)
+
+        # 0.1 + 0.2 is slightly above 0.3 as a float, but the same tick
+        portfolio.place_limit_sell_order(0.1 + 0.2, 10, lambda x: None)
+        portfolio.step(0.3)
+
+        self.assertEqual(portfolio.get_quantity(), 0)
+
+    def test_sub_tick_prices(self):
+        # without a tick size prices are compared exactly
+        portfolio = SimulationPortfolio('SHIB-USDC', 100, 0, 0.005)
+        portfolio.reset(0.00004)
+
+        portfolio.place_limit_buy_order(0.00002, 100, None)
+        portfolio.step(0.00004)
+        self.assertEqual(portfolio.get_budget(), 100)
+
+        portfolio.step(0.00002)
+        self.assertEqual(portfolio.get_budget(), 0)
+
+        # prices between ticks are rejected instead of rounded
+        portfolio = SimulationPortfolio('SHIB-USDC', 100, 0, 0.005,
+                                        tick_size=0.01)
+        with self.assertRaises(ValueError):
+            portfolio.place_limit_buy_order(0.00002, 100, None)
+        with self.assertRaises(ValueError):
+            portfolio.place_stop_sell_order(3000, 2999.995, 1, None)
+        self.assertEqual(len(portfolio.get_order_ids()), 0)
+
+    def test_order_without_fill_handler(self):
+        portfolio = SimulationPortfolio('ETH-USDC', 1000, 0, 0.005)
+        portfolio.reset(self.prices[0])
+
+        portfolio.place_market_buy_order(portfolio.get_budget(), None)
+        portfolio.step(self.prices[0])
+
+        self.assertEqual(portfolio.get_budget(), 0)
+        self.assertEqual(len(portfolio.order_fill), 1)
+
+    def test_history_size(self):
+        portfolio = SimulationPortfolio('ETH-USDC', 1000, 0, 0.005,
+                                        history_size=1)
+        portfolio.reset(self.prices[0])
+
+        portfolio.place_market_buy_order(500, lambda x: None)
+        portfolio.place_limit_buy_order(3000, 500, lambda x: None)
+
+        for price in self.prices:
+            portfolio.step(price)
+
+        steps, prices, quantities, is_buy = portfolio.order_fill.arrays()
+        self.assertEqual(len(portfolio.order_fill), 1)
+        self.assertEqual(prices.tolist(), [2966.4])
+        self.assertEqual(is_buy.tolist(), [True])
+
+    def test_history_size_zero(self):
+        portfolio = SimulationPortfolio('ETH-USDC', 1000, 0, 0.005,
+                                        history_size=0)
+        portfolio.reset(self.prices[0])
+
+        portfolio.place_market_buy_order(500, lambda x: None)
+        portfolio.place_limit_buy_order(3000, 500, lambda x: None)
+
+        for price in self.prices:
+            portfolio.step(price)
+
+        self.assertEqual(portfolio.get_budget(), 0)
+        self.assertEqual(len(portfolio.order_fill), 0)
+        for array in portfolio.order_fill.arrays():
+            self.assertEqual(len(array), 0)
+
+    def test_run_matches_step(self):
+        def place_orders(portfolio):
+            def sell(filled_order):
+                portfolio.place_limit_sell_order(
+                    3300, filled_order.quantity, lambda x: None)
+
+            portfolio.reset(self.prices[0])
+            portfolio.place_limit_buy_order(3000, 500, sell)
+            portfolio.place_stop_buy_order(3200, 3250, 500, lambda x: None)
+
+        stepped = SimulationPortfolio('ETH-USDC', 1000, 0, 0.005)
+        place_orders(stepped)
+        for price in self.prices:
+            stepped.step(price)
+
+        ran = SimulationPortfolio('ETH-USDC', 1000, 0, 0.005)
+        place_orders(ran)
+        ran.run(self.prices)
+
+        self.assertEqual(ran.index, stepped.index)
+        self.assertEqual(ran.get_budget(), stepped.get_budget())
+        self.assertEqual(ran.get_quantity(), stepped.get_quantity())
+        for ran_fills, stepped_fills in zip(ran.order_fill.arrays(),
+                                            stepped.order_fill.arrays()):
+            self.assertEqual(ran_fills.tolist(), stepped_fills.tolist())
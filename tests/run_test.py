@@ -0,0 +1,23 @@
+from unittest import TestCase
+
+import numpy as np
+
+from run import run_backtest, grid_search
+
+
+class TestRun(TestCase):
+    closes = np.array([3026.98, 2966.4, 3005.27, 3068.03, 3133.43, 3170.97,
+                       3238.03, 3199.98, 3262.07, 3292.83, 3215.8, 3166.78,
+                       3156.19, 3300.26, 3348.62, 3295.0, 3210.54, 3167.7])
+
+    def test_grid_search_matches_backtests(self):
+        params = [(1.02, 3000.0, 5), (1.01, 3100.0, 8), (1.05, 2900.0, 4)]
+
+        expected = []
+        for pct, base, n_levels in params:
+            portfolio, _ = run_backtest(self.closes, pct, base, n_levels)
+            expected.append(portfolio.budget +
+                            portfolio.quantity * self.closes[-1])
+
+        self.assertEqual(grid_search(self.closes, params, max_workers=2),
+                         expected)
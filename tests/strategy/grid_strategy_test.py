@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+import numpy as np
+
+from ethtrade.portfolio import SimulationPortfolio
+from ethtrade.strategy import GridStrategy
+
+
+class TestGridStrategy(TestCase):
+    prices = [2966.4, 2983.0, 3005.27, 2996.12, 3044.56, 3133.43, 3157.43,
+              3228.86, 3216.68, 3199.98, 3292.83, 3250.91, 3215.8, 3166.78,
+              3156.19, 3300.26, 3348.62, 3295.0, 3250.12, 3167.7, 3175.68,
+              2950.0, 3020.0, 3080.0, 3150.0, 3100.0, 3090.0, 3070.0]
+
+    def _strategy(self) -> GridStrategy:
+        portfolio = SimulationPortfolio('ETH-USDC', 1000, 0, 0.005)
+        levels = np.cumprod(np.ones(5) * 1.02) * 3000 / 1.02
+        strategy = GridStrategy(portfolio, levels)
+        strategy.reset(self.prices[0])
+        return strategy
+
+    def test_run_matches_step(self):
+        stepped = self._strategy()
+        for price in self.prices:
+            stepped.step(price)
+
+        ran = self._strategy()
+        ran.run(self.prices)
+
+        self.assertEqual(ran.current_idx, stepped.current_idx)
+        self.assertEqual(ran.portfolio.get_budget(),
+                         stepped.portfolio.get_budget())
+        self.assertEqual(ran.portfolio.get_quantity(),
+                         stepped.portfolio.get_quantity())
+        for ran_fills, stepped_fills in zip(
+                ran.portfolio.order_fill.arrays(),
+                stepped.portfolio.order_fill.arrays()):
+            self.assertEqual(ran_fills.tolist(), stepped_fills.tolist())
+
+        # the rise past a level placed a stop sell that filled on the way
+        # back down
+        _, _, _, is_buy = stepped.portfolio.order_fill.arrays()
+        self.assertIn(False, is_buy.tolist())